@@ -4,16 +4,103 @@ Bee AI - Vercel Serverless Function
 Simplified version for Vercel deployment
 """
 
+import functools
+import mmap
 import os
-import json
-import google.generativeai as genai
-from http.server import BaseHTTPRequestHandler
+import pickle
+import re
+import stat
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from collections import Counter, OrderedDict, defaultdict
+import numpy as np
+import orjson
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import urllib.parse
 
 # Global variables
+genai = None  # google.generativeai, imported by ensure_initialized()
 knowledge_base = []
 model = None
 
+MODEL_NAME = os.getenv('GEMINI_MODEL', 'gemini-2.0-flash-exp')
+
+# Static part of the prompt, attached to the model as its system instruction
+SYSTEM_PROMPT = """You are Bee AI, an expert assistant trained on beekeeping data from BloomWatch 2025 and GBIF 2025 databases.
+
+Your expertise includes:
+- Plant phenology and flowering times across Europe
+- Beekeeping practices and hive management
+- Honey production timing and techniques
+- Bee biology and behavior
+- Climate effects on plants and bees
+
+Each request contains training examples followed by a question.
+
+Instructions:
+1. Always respond in English only, regardless of question language
+2. Use the training examples as reference for style and data sources (BloomWatch 2025, GBIF 2025)
+3. If the question is similar to training examples, use that information
+4. If the question is different, use your general knowledge about bees, plants, and beekeeping
+5. Be conversational, helpful, and informative
+6. Keep responses concise (2-4 sentences) unless detail is requested
+7. For greetings, respond warmly as Bee AI
+8. You can answer ANY bee, plant, or nature-related question"""
+
+# Retrieval index, rebuilt whenever the knowledge base is loaded
+_TOKEN_RE = re.compile(r"\w+")
+BM25_K1 = 1.5
+BM25_B = 0.75
+# BM25 term-document weights stored column-wise (CSC): the postings of term j are
+# kb_term_docs[kb_term_ptr[j]:kb_term_ptr[j + 1]] with matching kb_term_weights
+kb_vocab = {}  # token -> column id
+kb_term_ptr = np.zeros(1, dtype=np.int64)
+kb_term_docs = np.zeros(0, dtype=np.int32)
+kb_term_weights = np.zeros(0, dtype=np.float32)
+
+# Knowledge base location, resolved once from the possible deployment layouts
+KB_PATH = next((p for p in [
+    'bee_ai_training_data.jsonl',
+    '../bee_ai_training_data.jsonl',
+    os.path.join(os.path.dirname(__file__), '..', 'bee_ai_training_data.jsonl'),
+    os.path.join(os.getcwd(), 'bee_ai_training_data.jsonl')
+] if os.path.exists(p)), None)
+
+JSONL_READ_BUFFER_SIZE = 65536  # bytes, used when the file cannot be memory-mapped
+
+# Processed knowledge base snapshot, reused across cold starts of the same container
+KB_SNAPSHOT_PATH = os.path.join(tempfile.gettempdir(), 'bee_ai_kb_snapshot.pkl')
+KB_SNAPSHOT_VERSION = 3  # bump whenever the snapshot contents change
+
+# Exact-match answer cache, kept at module level so it survives warm invocations
+ANSWER_CACHE_TTL = 3600  # seconds
+ANSWER_CACHE_MAX_ENTRIES = 1024
+_answer_cache = OrderedDict()  # normalized question -> (timestamp, answer)
+_answer_cache_lock = threading.Lock()
+_answer_cache_hits = 0
+_answer_cache_misses = 0
+
+# Semantic answer cache: reuse answers for paraphrased questions
+EMBEDDING_MODEL = 'models/text-embedding-004'
+EMBEDDING_TIMEOUT = 2.0  # seconds; the embedding call sits in front of every generation
+SEMANTIC_CACHE_THRESHOLD = 0.92  # minimum cosine similarity for a hit
+SEMANTIC_CACHE_MAX_ENTRIES = 2048
+SEMANTIC_CACHE_PATH = os.path.join(tempfile.gettempdir(), 'bee_ai_semantic_cache.npz')  # embeddings stored as int8
+# Fixed-size ring buffer: rows [0, len(answers)) of the preallocated
+# (SEMANTIC_CACHE_MAX_ENTRIES, d) matrix hold L2-normalized question embeddings
+_semantic_cache_embs = None
+_semantic_cache_questions = []
+_semantic_cache_answers = []
+_semantic_cache_next = 0  # slot written next, i.e. the oldest entry once full
+_semantic_cache_lock = threading.Lock()
+_semantic_cache_save_lock = threading.Lock()  # serializes writes of SEMANTIC_CACHE_PATH
+_semantic_cache_save_pending = False  # a save is queued but has not copied the cache yet
+
+# Worker threads for network calls that can overlap with local request work
+_executor = ThreadPoolExecutor(max_workers=4)
+
 def load_knowledge_base():
     """Load knowledge base from JSONL file"""
     global knowledge_base
@@ -21,29 +108,24 @@ def load_knowledge_base():
     try:
         knowledge_base = []
         
-        # Try to load the JSONL file from multiple possible locations
-        jsonl_candidates = [
-            'bee_ai_training_data.jsonl',
-            '../bee_ai_training_data.jsonl',
-            os.path.join(os.path.dirname(__file__), '..', 'bee_ai_training_data.jsonl'),
-            os.path.join(os.getcwd(), 'bee_ai_training_data.jsonl')
-        ]
-        
         jsonl_loaded = False
-        for jsonl_path in jsonl_candidates:
-            if os.path.exists(jsonl_path):
-                try:
-                    with open(jsonl_path, 'r', encoding='utf-8') as f:
-                        for line in f:
-                            if line.strip():
-                                entry = json.loads(line.strip())
-                                knowledge_base.append(entry)
-                    jsonl_loaded = True
-                    print(f"Loaded knowledge base from: {jsonl_path}")
-                    break
-                except Exception as e:
-                    print(f"Error loading {jsonl_path}: {str(e)}")
-                    continue
+        if KB_PATH is not None:
+            # Reuse the snapshot from a previous cold start if it is still current
+            if load_knowledge_snapshot(KB_PATH):
+                print(f"Loaded knowledge base snapshot for: {KB_PATH}")
+                return True
+            try:
+                # orjson parses each raw line directly, no str decoding
+                for line in iter_jsonl_lines(KB_PATH):
+                    if line.strip():
+                        knowledge_base.append(orjson.loads(line))
+                build_knowledge_index()
+                save_knowledge_snapshot(KB_PATH)
+                jsonl_loaded = True
+                print(f"Loaded knowledge base from: {KB_PATH}")
+            except Exception as e:
+                print(f"Error loading {KB_PATH}: {str(e)}")
+                knowledge_base = []
         
         if not jsonl_loaded:
             # Fallback: create a minimal knowledge base
@@ -68,6 +150,7 @@ def load_knowledge_base():
                     ]
                 }
             ]
+            build_knowledge_index()
         
         return True
         
@@ -75,6 +158,120 @@ def load_knowledge_base():
         print(f"Error loading knowledge base: {str(e)}")
         return False
 
+def iter_jsonl_lines(path):
+    """Yield the raw byte lines of a file, memory-mapped when possible"""
+    with open(path, 'rb', buffering=JSONL_READ_BUFFER_SIZE) as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files and filesystems without mmap support: large buffered reads
+            yield from f
+            return
+        with mm:
+            yield from iter(mm.readline, b'')
+
+def build_knowledge_index():
+    """Precompute BM25 term-document weights over the knowledge base"""
+    global kb_vocab, kb_term_ptr, kb_term_docs, kb_term_weights
+    
+    # Each entry is scored as one document made of its question and answer
+    term_counts = []
+    for entry in knowledge_base:
+        text = entry['messages'][0]['content'] + " " + entry['messages'][1]['content']
+        term_counts.append(Counter(_TOKEN_RE.findall(text.lower())))
+    
+    postings = defaultdict(list)
+    for i, counts in enumerate(term_counts):
+        for token, tf in counts.items():
+            postings[token].append((i, tf))
+    
+    num_docs = len(term_counts)
+    doc_lengths = np.asarray([sum(counts.values()) for counts in term_counts], dtype=np.float32)
+    avg_doc_length = float(doc_lengths.mean()) if num_docs else 0.0
+    # Per-document BM25 length normalization: k1 * (1 - b + b * |d| / avgdl)
+    length_norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths / max(avg_doc_length, 1.0))
+    
+    vocab = {}
+    term_ptr = [0]
+    term_docs = []
+    term_weights = []
+    for token, entries in postings.items():
+        vocab[token] = len(vocab)
+        idf = np.log(1 + (num_docs - len(entries) + 0.5) / (len(entries) + 0.5))
+        for i, tf in entries:
+            term_docs.append(i)
+            term_weights.append(idf * tf * (BM25_K1 + 1) / (tf + length_norm[i]))
+        term_ptr.append(len(term_docs))
+    
+    kb_vocab = vocab
+    kb_term_ptr = np.asarray(term_ptr, dtype=np.int64)
+    kb_term_docs = np.asarray(term_docs, dtype=np.int32)
+    kb_term_weights = np.asarray(term_weights, dtype=np.float32)
+
+def _is_private_file(path):
+    """Whether path is a regular file owned by this user and not writable by others"""
+    st = os.lstat(path)
+    if not stat.S_ISREG(st.st_mode):
+        return False
+    if hasattr(os, 'getuid') and st.st_uid != os.getuid():
+        return False
+    return not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+def load_knowledge_snapshot(jsonl_path):
+    """Restore the knowledge base and its index from a snapshot newer than jsonl_path"""
+    global knowledge_base, kb_vocab, kb_term_ptr, kb_term_docs, kb_term_weights
+    
+    try:
+        if not os.path.exists(KB_SNAPSHOT_PATH):
+            return False
+        # Unpickling runs code, so only trust a snapshot this user wrote
+        if not _is_private_file(KB_SNAPSHOT_PATH):
+            print(f"Ignoring untrusted knowledge base snapshot: {KB_SNAPSHOT_PATH}")
+            return False
+        if os.path.getmtime(KB_SNAPSHOT_PATH) < os.path.getmtime(jsonl_path):
+            return False
+        
+        with open(KB_SNAPSHOT_PATH, 'rb') as f:
+            snapshot = pickle.load(f)
+        if snapshot.get('version') != KB_SNAPSHOT_VERSION or snapshot.get('source') != os.path.abspath(jsonl_path):
+            return False
+        
+        knowledge_base = snapshot['knowledge_base']
+        kb_vocab = snapshot['vocab']
+        kb_term_ptr = snapshot['term_ptr']
+        kb_term_docs = snapshot['term_docs']
+        kb_term_weights = snapshot['term_weights']
+        return True
+        
+    except Exception as e:
+        print(f"Error loading knowledge base snapshot: {str(e)}")
+        return False
+
+def save_knowledge_snapshot(jsonl_path):
+    """Persist the parsed knowledge base and its index for later cold starts"""
+    try:
+        snapshot = {
+            'version': KB_SNAPSHOT_VERSION,
+            'source': os.path.abspath(jsonl_path),
+            'knowledge_base': knowledge_base,
+            'vocab': kb_vocab,
+            'term_ptr': kb_term_ptr,
+            'term_docs': kb_term_docs,
+            'term_weights': kb_term_weights
+        }
+        # mkstemp creates a new 0600 file, so a pre-planted path can't redirect the write
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(KB_SNAPSHOT_PATH), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(snapshot, f, protocol=5)
+            os.replace(tmp_path, KB_SNAPSHOT_PATH)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        
+    except Exception as e:
+        print(f"Error saving knowledge base snapshot: {str(e)}")
+
 def initialize_gemini():
     """Initialize Gemini API"""
     global model
@@ -89,8 +286,8 @@ def initialize_gemini():
         # Configure Gemini
         genai.configure(api_key=api_key)
         
-        # Initialize model
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        # Initialize model; the static prompt goes in as system instruction
+        model = genai.GenerativeModel(MODEL_NAME, system_instruction=SYSTEM_PROMPT)
         
         print("Gemini API initialized successfully")
         return True
@@ -99,181 +296,478 @@ def initialize_gemini():
         print(f"Error initializing Gemini: {str(e)}")
         return False
 
+@functools.lru_cache(maxsize=4096)
+def normalize_question(question):
+    """Return (whitespace-collapsed lowercase text, word tokens) for a question (memoized)"""
+    question_lower = question.lower()
+    return " ".join(question_lower.split()), tuple(_TOKEN_RE.findall(question_lower))
+
 def find_relevant_knowledge(question):
     """Find relevant knowledge entries for the question"""
     if not knowledge_base:
         return []
     
-    question_lower = question.lower()
-    relevant_entries = []
-    
-    # Simple keyword matching
-    keywords = question_lower.split()
+    # BM25 scoring against the precomputed term-document weights; punctuation
+    # is stripped and repeated words only count once
+    _, tokens = normalize_question(question)
+    keywords = set(tokens)
+    columns = [kb_vocab[keyword] for keyword in keywords if keyword in kb_vocab]
+    if not columns:
+        return []
     
-    for entry in knowledge_base:
-        user_content = entry['messages'][0]['content'].lower()
-        assistant_content = entry['messages'][1]['content'].lower()
-        combined_content = user_content + " " + assistant_content
-        
-        # Check for keyword matches
-        score = 0
-        for keyword in keywords:
-            if keyword in user_content:
-                score += 3
-            if keyword in assistant_content:
-                score += 2
-            if keyword in combined_content:
-                score += 1
-        
-        if score > 0:
-            relevant_entries.append((entry, score))
+    # Sparse matrix-vector product: sum the BM25 weights of every matched posting per entry
+    doc_ids = np.concatenate([kb_term_docs[kb_term_ptr[j]:kb_term_ptr[j + 1]] for j in columns])
+    weights = np.concatenate([kb_term_weights[kb_term_ptr[j]:kb_term_ptr[j + 1]] for j in columns])
+    scores = np.bincount(doc_ids, weights=weights, minlength=len(knowledge_base))
     
-    # Sort by relevance score
-    relevant_entries.sort(key=lambda x: x[1], reverse=True)
+    # Return top 3 most relevant entries, ties broken by knowledge base order
+    candidates = np.flatnonzero(scores)
+    top_entries = candidates[np.argsort(-scores[candidates], kind='stable')[:3]]
+    return [knowledge_base[i] for i in top_entries]
+
+def _answer_cache_key(question):
+    """Normalize a question for exact-match cache lookups"""
+    return normalize_question(question)[0]
+
+def get_cached_answer(question):
+    """Return a cached answer for the question, or None on miss/expiry"""
+    global _answer_cache_hits, _answer_cache_misses
     
-    # Return top 3 most relevant entries
-    return [entry[0] for entry in relevant_entries[:3]]
+    key = _answer_cache_key(question)
+    with _answer_cache_lock:
+        cached = _answer_cache.get(key)
+        if cached is not None:
+            timestamp, answer = cached
+            if time.time() - timestamp < ANSWER_CACHE_TTL:
+                _answer_cache.move_to_end(key)
+                _answer_cache_hits += 1
+                print(f"Answer cache hit (hits={_answer_cache_hits}, misses={_answer_cache_misses})")
+                return answer
+            del _answer_cache[key]
+        _answer_cache_misses += 1
+        print(f"Answer cache miss (hits={_answer_cache_hits}, misses={_answer_cache_misses})")
+        return None
 
-def generate_response_with_gemini(question):
-    """Generate response using Gemini API with knowledge base fine-tuning"""
-    global model, knowledge_base
+def store_cached_answer(question, answer):
+    """Store an answer, evicting the least recently used entries when full"""
+    key = _answer_cache_key(question)
+    with _answer_cache_lock:
+        _answer_cache[key] = (time.time(), answer)
+        _answer_cache.move_to_end(key)
+        while len(_answer_cache) > ANSWER_CACHE_MAX_ENTRIES:
+            _answer_cache.popitem(last=False)
+
+def embed_question(question):
+    """Return the L2-normalized embedding of a question, or None on failure"""
+    try:
+        result = genai.embed_content(
+            model=EMBEDDING_MODEL,
+            content=question,
+            task_type='semantic_similarity',
+            # Fail fast instead of the client's default 60 s of retries; a missing
+            # embedding only skips the semantic cache
+            request_options={'timeout': EMBEDDING_TIMEOUT, 'retry': None}
+        )
+        embedding = np.asarray(result['embedding'], dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        if norm == 0:
+            return None
+        return embedding / norm
+        
+    except Exception as e:
+        print(f"Error embedding question: {str(e)}")
+        return None
+
+def quantize_embeddings(embs):
+    """Quantize embedding rows to int8 with one float32 scale per row"""
+    scales = np.abs(embs).max(axis=1, keepdims=True) / 127
+    scales[scales == 0] = 1
+    return np.round(embs / scales).astype(np.int8), scales.astype(np.float32)
+
+def dequantize_embeddings(embs, scales):
+    """Inverse of quantize_embeddings"""
+    return embs.astype(np.float32) * scales
+
+def load_semantic_cache():
+    """Restore the semantic cache persisted by a previous invocation"""
+    global _semantic_cache_embs, _semantic_cache_questions, _semantic_cache_answers, _semantic_cache_next
+    
+    if not os.path.exists(SEMANTIC_CACHE_PATH):
+        return False
     
     try:
-        # Check if model is initialized
-        if model is None:
-            print("Model not initialized")
-            return "I apologize, but the AI service is currently unavailable. Please try again later."
+        # Cached answers are served verbatim, so only trust a file this user wrote
+        if not _is_private_file(SEMANTIC_CACHE_PATH):
+            print(f"Ignoring untrusted semantic cache: {SEMANTIC_CACHE_PATH}")
+            return False
         
-        # Find relevant knowledge from training data
-        relevant_knowledge = find_relevant_knowledge(question)
+        with np.load(SEMANTIC_CACHE_PATH) as data:
+            embs = dequantize_embeddings(
+                data['embs'][:SEMANTIC_CACHE_MAX_ENTRIES],
+                data['scales'][:SEMANTIC_CACHE_MAX_ENTRIES]
+            )
+            questions, answers = orjson.loads(data['texts'].tobytes())
+            questions = questions[:SEMANTIC_CACHE_MAX_ENTRIES]
+            answers = answers[:SEMANTIC_CACHE_MAX_ENTRIES]
+            next_slot = int(data['next']) if 'next' in data else len(answers)
         
-        # Build comprehensive prompt with training examples
-        prompt = f"""You are Bee AI, an expert assistant trained on beekeeping data from BloomWatch 2025 and GBIF 2025 databases.
+        buffer = np.zeros((SEMANTIC_CACHE_MAX_ENTRIES, embs.shape[1]), dtype=np.float32)
+        buffer[:len(embs)] = embs
+        with _semantic_cache_lock:
+            _semantic_cache_embs = buffer
+            _semantic_cache_questions = questions
+            _semantic_cache_answers = answers
+            _semantic_cache_next = next_slot % SEMANTIC_CACHE_MAX_ENTRIES
+        print(f"Loaded {len(answers)} semantic cache entries from: {SEMANTIC_CACHE_PATH}")
+        return True
+        
+    except Exception as e:
+        print(f"Error loading semantic cache: {str(e)}")
+        return False
 
-Your expertise includes:
-- Plant phenology and flowering times across Europe
-- Beekeeping practices and hive management
-- Honey production timing and techniques
-- Bee biology and behavior
-- Climate effects on plants and bees
+def _save_semantic_cache():
+    """Persist the semantic cache to the temp dir; runs on _executor, off the request path"""
+    global _semantic_cache_save_pending
+    
+    # Serialize writers so an older copy can never replace a newer file
+    with _semantic_cache_save_lock:
+        with _semantic_cache_lock:
+            # Stores made after this copy schedule another save
+            _semantic_cache_save_pending = False
+            size = len(_semantic_cache_answers)
+            embs = _semantic_cache_embs[:size].copy()
+            texts = orjson.dumps([_semantic_cache_questions, _semantic_cache_answers])
+            next_slot = _semantic_cache_next
+        
+        try:
+            embs, scales = quantize_embeddings(embs)
+            # mkstemp creates a new 0600 file, so a pre-planted path can't redirect the write
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(SEMANTIC_CACHE_PATH), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(
+                        f,
+                        embs=embs,
+                        scales=scales,
+                        texts=np.frombuffer(texts, dtype=np.uint8),
+                        next=np.array(next_slot)
+                    )
+                os.replace(tmp_path, SEMANTIC_CACHE_PATH)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            print(f"Error saving semantic cache: {str(e)}")
 
-Training Examples (use these as reference for style and information):
-"""
+def get_semantic_cached_answer(question_embedding):
+    """Return the answer of the most similar cached question above the threshold"""
+    with _semantic_cache_lock:
+        size = len(_semantic_cache_answers)
+        if _semantic_cache_embs is None or size == 0:
+            return None
+        
+        # Exact scan over the filled rows; at this cache size a single BLAS
+        # mat-vec is cheaper than maintaining an approximate (HNSW) index
+        similarities = _semantic_cache_embs[:size] @ question_embedding
+        best = int(similarities.argmax())
+        if similarities[best] >= SEMANTIC_CACHE_THRESHOLD:
+            print(f"Semantic cache hit (similarity={similarities[best]:.3f}): {_semantic_cache_questions[best]}")
+            return _semantic_cache_answers[best]
+        return None
+
+def store_semantic_cached_answer(question, question_embedding, answer):
+    """Add an answer to the semantic cache, overwriting the oldest entry when full"""
+    global _semantic_cache_embs, _semantic_cache_next, _semantic_cache_save_pending
+    
+    with _semantic_cache_lock:
+        if _semantic_cache_embs is None:
+            _semantic_cache_embs = np.zeros((SEMANTIC_CACHE_MAX_ENTRIES, len(question_embedding)), dtype=np.float32)
         
-        # Add relevant training examples
-        if relevant_knowledge and len(relevant_knowledge) > 0:
-            for entry in relevant_knowledge[:3]:  # Use top 3 most relevant
-                user_q = entry['messages'][0]['content']
-                assistant_a = entry['messages'][1]['content']
-                prompt += f"\nExample Q: {user_q}\nExample A: {assistant_a}\n"
+        slot = _semantic_cache_next
+        _semantic_cache_embs[slot] = question_embedding
+        if slot < len(_semantic_cache_answers):
+            _semantic_cache_questions[slot] = question
+            _semantic_cache_answers[slot] = answer
+        else:
+            _semantic_cache_questions.append(question)
+            _semantic_cache_answers.append(answer)
+        _semantic_cache_next = (slot + 1) % SEMANTIC_CACHE_MAX_ENTRIES
         
-        prompt += f"""
+        # Write in the background; a save that is already queued picks this entry up
+        if not _semantic_cache_save_pending:
+            _semantic_cache_save_pending = True
+            _executor.submit(_save_semantic_cache)
+
+# Dynamic part of the prompt: retrieved examples followed by the question
+EXAMPLES_HEADER = """Training Examples (use these as reference for style and information):
+"""
+QUESTION_TEMPLATE = """
 
 Now answer this question in the same style:
 Question: {question}
 
-Instructions:
-1. Always respond in English only, regardless of question language
-2. Use the training examples above as reference for style and data sources (BloomWatch 2025, GBIF 2025)
-3. If the question is similar to training examples, use that information
-4. If the question is different, use your general knowledge about bees, plants, and beekeeping
-5. Be conversational, helpful, and informative
-6. Keep responses concise (2-4 sentences) unless detail is requested
-7. For greetings, respond warmly as Bee AI
-8. You can answer ANY bee, plant, or nature-related question
-
 Answer:"""
 
+UNAVAILABLE_MESSAGE = "I apologize, but the AI service is currently unavailable. Please try again later."
+EMPTY_RESPONSE_MESSAGE = "I apologize, but I couldn't generate a response. Please try rephrasing your question."
+ERROR_MESSAGE = "I apologize, but I encountered an error processing your question. Please try again."
+
+def prepare_answer(question):
+    """Check the caches and build the prompt; returns (cached answer or None, prompt, question embedding or None)"""
+    # Serve repeated questions from the answer cache
+    cached_answer = get_cached_answer(question)
+    if cached_answer is not None:
+        return cached_answer, None, None
+    
+    # The embedding request is network-bound, so run it in the background
+    # while knowledge retrieval and prompt building run here
+    embedding_future = _executor.submit(embed_question, question)
+    prompt = build_prompt(question)
+    try:
+        question_embedding = embedding_future.result(timeout=EMBEDDING_TIMEOUT)
+    except FutureTimeoutError:
+        # Don't hold up generation on a slow embedding; skip the semantic cache
+        print("Embedding timed out, skipping semantic cache")
+        question_embedding = None
+    
+    # Fall back to the semantic cache for paraphrased questions
+    if question_embedding is not None:
+        cached_answer = get_semantic_cached_answer(question_embedding)
+        if cached_answer is not None:
+            store_cached_answer(question, cached_answer)
+            return cached_answer, None, question_embedding
+    
+    return None, prompt, question_embedding
+
+def store_answer(question, question_embedding, answer):
+    """Store a freshly generated answer in the exact and semantic caches"""
+    store_cached_answer(question, answer)
+    if question_embedding is not None:
+        store_semantic_cached_answer(question, question_embedding, answer)
+
+def build_prompt(question):
+    """Build the per-request prompt; SYSTEM_PROMPT is attached to the model"""
+    # Find relevant knowledge from training data
+    relevant_knowledge = find_relevant_knowledge(question)
+    
+    # Collect the parts and join once instead of growing the prompt string
+    parts = [EXAMPLES_HEADER]
+    parts.extend(
+        f"\nExample Q: {entry['messages'][0]['content']}\nExample A: {entry['messages'][1]['content']}\n"
+        for entry in relevant_knowledge[:3]  # Use top 3 most relevant
+    )
+    parts.append(QUESTION_TEMPLATE.format(question=question))
+    
+    return "".join(parts)
+
+def generate_response_with_gemini(question):
+    """Generate response using Gemini API with knowledge base fine-tuning"""
+    try:
+        # Check if model is initialized
+        if model is None:
+            print("Model not initialized")
+            return UNAVAILABLE_MESSAGE
+        
+        cached_answer, prompt, question_embedding = prepare_answer(question)
+        if cached_answer is not None:
+            return cached_answer
+        
         # Generate response
         response = model.generate_content(prompt)
         
         if response and response.text:
-            return response.text.strip()
+            answer = response.text.strip()
+            store_answer(question, question_embedding, answer)
+            return answer
         else:
             print("Empty response from Gemini")
-            return "I apologize, but I couldn't generate a response. Please try rephrasing your question."
+            return EMPTY_RESPONSE_MESSAGE
         
     except Exception as e:
         print(f"Error generating Gemini response: {str(e)}")
-        return "I apologize, but I encountered an error processing your question. Please try again."
+        return ERROR_MESSAGE
+
+def stream_response_with_gemini(question):
+    """Yield the answer as text chunks, streaming from Gemini on cache misses"""
+    chunks = []
+    try:
+        # Check if model is initialized
+        if model is None:
+            print("Model not initialized")
+            yield UNAVAILABLE_MESSAGE
+            return
+        
+        cached_answer, prompt, question_embedding = prepare_answer(question)
+        if cached_answer is not None:
+            yield cached_answer
+            return
+        
+        # Stream response chunks as soon as Gemini produces them
+        for chunk in model.generate_content(prompt, stream=True):
+            if chunk.text:
+                chunks.append(chunk.text)
+                yield chunk.text
+        
+        answer = "".join(chunks).strip()
+        if answer:
+            store_answer(question, question_embedding, answer)
+        else:
+            print("Empty response from Gemini")
+            yield EMPTY_RESPONSE_MESSAGE
+        
+    except Exception as e:
+        print(f"Error streaming Gemini response: {str(e)}")
+        # Once part of the answer was sent, let the caller report the error as a separate event
+        if chunks:
+            raise
+        yield ERROR_MESSAGE
 
 # Fallback function removed - using only Gemini AI responses
 
-# Initialize on module load
-if not load_knowledge_base():
-    print("Failed to load knowledge base")
-if not initialize_gemini():
-    print("Failed to initialize Gemini API")
+# Common questions answered in the background after a cold start
+WARMUP_QUESTIONS = [
+    "hello",
+    "What can you do?",
+    "When does wild garlic bloom in Germany?",
+    "When does clover bloom in Turkey?",
+    "What's the best period for honey collection in southern Spain?",
+    "How will climate change affect clover blooming in Sweden this year?"
+]
+
+def warmup_caches():
+    """Populate the answer caches with WARMUP_QUESTIONS"""
+    for question in WARMUP_QUESTIONS:
+        generate_response_with_gemini(question)
+    print(f"Warmed up answer caches with {len(WARMUP_QUESTIONS)} questions")
+
+# Initialized on the first chat request so health checks skip the KB load and Gemini import
+_init_lock = threading.Lock()
+_initialized = False
+
+def ensure_initialized():
+    """Load the knowledge base and initialize Gemini once, on first use"""
+    global genai, _initialized
+    
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        
+        import google.generativeai as genai
+        
+        if not load_knowledge_base():
+            print("Failed to load knowledge base")
+        if not initialize_gemini():
+            print("Failed to initialize Gemini API")
+        load_semantic_cache()
+        if model is not None:
+            threading.Thread(target=warmup_caches, daemon=True).start()
+        
+        _initialized = True
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
         if self.path == '/api/health':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
             response = {
                 'status': 'healthy',
+                'initialized': _initialized,
                 'gemini_loaded': model is not None,
                 'knowledge_base_loaded': len(knowledge_base) > 0,
                 'knowledge_entries': len(knowledge_base)
             }
             
-            self.wfile.write(json.dumps(response).encode())
+            self.send_json(200, response)
             
         else:
             self.send_response(404)
             self.end_headers()
     
     def do_POST(self):
-        if self.path == '/api/chat':
+        url = urllib.parse.urlparse(self.path)
+        if url.path == '/api/chat':
             try:
                 # Read request body
                 content_length = int(self.headers['Content-Length'])
                 post_data = self.rfile.read(content_length)
-                data = json.loads(post_data.decode('utf-8'))
+                data = orjson.loads(post_data)
                 
                 question = data.get('question', '').strip()
                 
                 if not question:
-                    self.send_response(400)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': 'No question provided'}).encode())
+                    self.send_json(400, {'error': 'No question provided'})
+                    return
+                
+                ensure_initialized()
+                
+                # Stream the answer as server-sent events when requested
+                stream = urllib.parse.parse_qs(url.query).get('stream', ['false'])[0].lower()
+                if stream in ('1', 'true') or 'text/event-stream' in self.headers.get('Accept', ''):
+                    self.stream_answer(question)
                     return
                 
                 # Generate response using Gemini
                 response_text = generate_response_with_gemini(question)
                 
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                
                 response = {
                     'question': question,
                     'answer': response_text,
                     'status': 'success'
                 }
                 
-                self.wfile.write(json.dumps(response).encode())
+                self.send_json(200, response)
                 
             except Exception as e:
                 print(f"Error in chat endpoint: {str(e)}")
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'error': 'Internal server error'}).encode())
+                self.send_json(500, {'error': 'Internal server error'})
         else:
             self.send_response(404)
             self.end_headers()
     
+    def send_json(self, code, response):
+        """Send a JSON response with a single write of status line, headers and body"""
+        body = orjson.dumps(response)
+        header = (
+            f"{self.protocol_version} {code} {self.responses[code][0]}\r\n"
+            "Content-Type: application/json\r\n"
+            "Access-Control-Allow-Origin: *\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "\r\n"
+        ).encode('latin-1')
+        self.log_request(code)
+        self.wfile.write(header + body)
+    
+    def stream_answer(self, question):
+        """Write the answer as server-sent events: {"delta": ...} chunks, then {"done": true} or {"error": ...}"""
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        
+        try:
+            for delta in stream_response_with_gemini(question):
+                self.wfile.write(b'data: ' + orjson.dumps({'delta': delta}) + b'\n\n')
+                self.wfile.flush()
+            self.wfile.write(b'data: ' + orjson.dumps({'done': True}) + b'\n\n')
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            print("Client disconnected during streaming")
+        except Exception:
+            # Gemini failed after part of the answer was sent; report it as its own event
+            self.wfile.write(b'data: ' + orjson.dumps({'error': ERROR_MESSAGE}) + b'\n\n')
+            self.wfile.flush()
+    
     def do_OPTIONS(self):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
+
+# For local testing; requests are handled on separate threads
+if __name__ == '__main__':
+    port = int(os.getenv('PORT', '5001'))
+    server = ThreadingHTTPServer(('0.0.0.0', port), handler)
+    print(f"Bee AI API listening on http://localhost:{port}")
+    server.serve_forever()